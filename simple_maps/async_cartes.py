@@ -0,0 +1,296 @@
+"""
+Interact with Cartes.io API asynchronously.
+
+Mirrors `Cartes` with coroutines so that many requests can be awaited
+together, multiplexed over a single HTTP/2 connection.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from .cache import ResponseCache, cache_key
+from .cartes import RATE_LIMIT, check_marker, compact
+from .enums import Permission, Privacy
+from .ratelimit import RetryBucket, TokenBucket, retry_delay
+from .util import (
+    ASYNC_LIMITS,
+    RequestType,
+    create_async_client,
+    request_json_async,
+)
+
+
+class AsyncCartes:
+    """Asynchronous wrapper class for interacting with the Cartes.io API."""
+
+    def __init__(
+        self,
+        base_url: str = "https://cartes.io/api",
+        client: Optional[httpx.AsyncClient] = None,
+        cache: Optional[ResponseCache] = None,
+        rate_limit: Optional[Tuple[float, float]] = RATE_LIMIT,
+        max_retries: int = 3,
+        limits: httpx.Limits = ASYNC_LIMITS,
+    ):
+        """
+        Set API base URL, the optional client to share and GET cache.
+
+        rate_limit is the (capacity, refill rate per second) of the token
+        bucket used to pace requests, or None to send them unpaced.
+        Requests rejected with 429 or 503 are retried up to max_retries
+        times, while the shared retry quota lasts. limits sizes the
+        connection pool of the client created when none is given.
+        """
+        self.base_url = base_url
+        self._maps_url = f"{base_url}/maps"
+        self.cache = cache
+        self._owns_client = client is None
+        self.client = client or create_async_client(limits)
+        self._bucket = TokenBucket(*rate_limit) if rate_limit else None
+        self.max_retries = max_retries
+        self._retry_bucket = RetryBucket()
+        self._inflight: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+
+    async def __aenter__(self) -> "AsyncCartes":
+        """Enter the client context."""
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """Close the client if it was created here."""
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the client if it was created here."""
+        if self._owns_client:
+            await self.client.aclose()
+
+    async def _request(
+        self,
+        request_type: RequestType,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        cached: bool = False,
+        body: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Send a request with the client of this instance.
+
+        Identical GETs sent while one is still in flight wait for its
+        response instead of being sent again.
+        """
+        if request_type != "get":
+            return await self._send(request_type, url, params, cached, body)
+
+        key = cache_key(url, params)
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(
+                self._send(request_type, url, params, cached, body)
+            )
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded, so that a cancelled caller does not cancel the others.
+        return await asyncio.shield(future)
+
+    async def _send(
+        self,
+        request_type: RequestType,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        cached: bool,
+        body: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Send a request, retrying it if the server is throttling."""
+        attempt = 0
+        while True:
+            if self._bucket is not None:
+                await self._bucket.acquire_async()
+            try:
+                data = await request_json_async(
+                    self.client,
+                    request_type=request_type,
+                    url=url,
+                    params=params,
+                    cache=self.cache if cached else None,
+                    body=body,
+                )
+            except httpx.HTTPStatusError as e:
+                delay = retry_delay(
+                    e.response, attempt, self.max_retries, self._retry_bucket
+                )
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+            else:
+                self._retry_bucket.refund()
+                return data
+
+    async def map_get(self, map_uuid: str) -> Dict[str, Any]:
+        """
+        Get a single map.
+
+        GET /api/maps/{map-uuid}
+        """
+        return await self._request(
+            request_type="get",
+            url=f"{self._maps_url}/{map_uuid}",
+            cached=True,
+        )
+
+    async def map_get_many(self, map_uuids: List[str]) -> List[Dict[str, Any]]:
+        """Get several maps concurrently."""
+        return await asyncio.gather(
+            *(self.map_get(map_uuid) for map_uuid in map_uuids)
+        )
+
+    async def map_create(
+        self,
+        title: Optional[str] = None,
+        slug: Optional[str] = None,
+        description: Optional[str] = None,
+        privacy: Optional[Privacy] = None,
+        users_can_create_markers: Optional[Permission] = None,
+    ) -> Dict[str, Any]:
+        """
+        Create a map.
+
+        POST /api/maps
+        """
+        return await self._request(
+            request_type="post",
+            url=self._maps_url,
+            body=compact(
+                title=title,
+                slug=slug,
+                description=description,
+                privacy=privacy,
+                users_can_create_markers=users_can_create_markers,
+            ),
+        )
+
+    async def map_delete(self, token: str, map_id: str) -> Dict[str, Any]:
+        """
+        Delete a single map.
+
+        DELETE /api/maps/{map-id}
+        """
+        return await self._request(
+            request_type="delete",
+            url=f"{self._maps_url}/{map_id}",
+            params={
+                "token": token,
+            },
+        )
+
+    async def marker_list(
+        self, map_id: str, show_expired: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        Get all markers on a map.
+
+        GET /api/maps/{map-id}/markers
+        """
+        return await self._request(
+            request_type="get",
+            url=f"{self._maps_url}/{map_id}/markers",
+            params=compact(show_expired=show_expired),
+            cached=True,
+        )
+
+    async def marker_list_many(
+        self, map_ids: List[str], show_expired: Optional[bool] = None
+    ) -> List[Dict[str, Any]]:
+        """Get all markers on several maps concurrently."""
+        return await asyncio.gather(
+            *(self.marker_list(map_id, show_expired) for map_id in map_ids)
+        )
+
+    async def marker_create(
+        self,
+        map_token: str,
+        map_id: str,
+        lat: float,
+        lng: float,
+        category: Optional[int] = None,
+        category_name: Optional[str] = None,
+        description: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Create a marker on a map.
+
+        POST /api/maps/{map-id}/markers
+        """
+        check_marker(lat, lng, category, category_name)
+        return await self._request(
+            request_type="post",
+            url=f"{self._maps_url}/{map_id}/markers",
+            body=compact(
+                map_token=map_token,
+                category=category,
+                lat=lat,
+                lng=lng,
+                description=description,
+                category_name=category_name,
+            ),
+        )
+
+    async def marker_create_many(
+        self,
+        map_token: str,
+        map_id: str,
+        markers: List[Dict[str, Any]],
+        concurrency: int = 10,
+    ) -> List[Any]:
+        """
+        Create many markers on a map concurrently.
+
+        Each marker is a dict of `marker_create` arguments. At most
+        `concurrency` requests are in flight at once; a marker that could
+        not be created is returned as its exception so the others are not
+        lost.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def create(marker: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.marker_create(map_token, map_id, **marker)
+
+        return await asyncio.gather(
+            *(create(marker) for marker in markers), return_exceptions=True
+        )
+
+    async def marker_edit(
+        self,
+        token: str,
+        map_id: str,
+        marker_id: str,
+        description: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Edit a marker on a map.
+
+        PUT /api/maps/{map-id}/markers/{marker-id}
+        """
+        return await self._request(
+            request_type="put",
+            url=f"{self._maps_url}/{map_id}/markers/{marker_id}",
+            body=compact(token=token, description=description),
+        )
+
+    async def marker_delete(
+        self, token: str, map_id: str, marker_id: str
+    ) -> Dict[str, Any]:
+        """
+        Delete a marker on a map.
+
+        DELETE /api/maps/{map-id}/markers/{marker-id}
+        """
+        return await self._request(
+            request_type="delete",
+            url=f"{self._maps_url}/{map_id}/markers/{marker_id}",
+            params={
+                "token": token,
+            },
+        )
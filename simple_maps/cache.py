@@ -0,0 +1,243 @@
+"""On-disk cache of GET responses, revalidated with ETag/Last-Modified."""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional
+
+import httpx
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Returned by ResponseCache.fresh on a miss, as a JSON body can be null.
+MISSING: Any = object()
+
+
+def default_path() -> Path:
+    """Return the cache file path inside the user cache directory."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "simple_maps" / "responses.sqlite"
+
+
+def cache_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Hash the URL and params of a request."""
+    key = hashlib.blake2b(url.encode(), digest_size=16)
+    if params:
+        key.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return key.hexdigest()
+
+
+class CachedResponse(NamedTuple):
+    """Body of a response and the validators to revalidate it."""
+
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body: bytes
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for this response."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def _cache_control(response: httpx.Response) -> Dict[str, str]:
+    """Parse the Cache-Control directives of a response."""
+    directives = {}
+    for directive in response.headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+    return directives
+
+
+def max_age(response: httpx.Response) -> Optional[float]:
+    """
+    Return for how many seconds a response can be reused as is.
+
+    None when it has no max-age or must be revalidated every time.
+    """
+    directives = _cache_control(response)
+    if "no-cache" in directives:
+        return None
+    try:
+        return float(directives["max-age"])
+    except (KeyError, ValueError):
+        return None
+
+
+class _Entry(NamedTuple):
+    """Response kept in memory with its parsed body and expiry time."""
+
+    cached: CachedResponse
+    data: Any
+    expires: Optional[float]
+
+
+class ResponseCache:
+    """
+    SQLite store of responses keyed by `cache_key`.
+
+    The last `maxsize` responses are also kept in memory along with
+    their parsed body, so revalidating them skips the database and the
+    JSON parsing. Responses with a Cache-Control max-age are not even
+    revalidated until they expire. Parsed bodies are returned without
+    copying them, so callers must not mutate them.
+    """
+
+    def __init__(self, path: Optional[Path] = None, maxsize: int = 256):
+        """Set the database path, it is only opened when first used."""
+        self.path = path or default_path()
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._memory: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+                "body BLOB)"
+            )
+        return self._db
+
+    def _remember(
+        self,
+        key: str,
+        cached: CachedResponse,
+        data: Any,
+        response: Optional[httpx.Response] = None,
+    ) -> None:
+        """Keep a parsed response in memory, evicting the oldest one."""
+        age = max_age(response) if response is not None else None
+        expires = time.monotonic() + age if age else None
+        self._memory[key] = _Entry(cached, data, expires)
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def fresh(self, key: str) -> Any:
+        """
+        Return the parsed body of a response that has not expired.
+
+        Returns MISSING if there is none. The body is shared by every
+        hit, so it must not be mutated.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None or entry.expires is None:
+                return MISSING
+            if entry.expires <= time.monotonic():
+                return MISSING
+            self._memory.move_to_end(key)
+            return entry.data
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return the cached response, if any."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key].cached
+        try:
+            with self._lock:
+                row = (
+                    self._connect()
+                    .execute(
+                        "SELECT etag, last_modified, body FROM responses "
+                        "WHERE key = ?",
+                        (key,),
+                    )
+                    .fetchone()
+                )
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Could not read response cache: %s", e)
+            return None
+        return CachedResponse(*row) if row else None
+
+    def load(
+        self, key: str, cached: CachedResponse, response: httpx.Response
+    ) -> Any:
+        """
+        Return the parsed body of a response revalidated with a 304.
+
+        Bodies parsed before are returned as is, without copying them.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry.cached is cached:
+                data = entry.data
+            else:
+                data = orjson.loads(cached.body)
+            self._remember(key, cached, data, response)
+        return data
+
+    def store(self, key: str, response: httpx.Response, data: Any) -> None:
+        """Save a response, and its parsed body, to reuse it later."""
+        if response.status_code != 200:
+            return
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if "no-store" in _cache_control(response) or not (
+            etag or last_modified or max_age(response)
+        ):
+            # Drop the copy kept before, it must not be revalidated.
+            self._forget(key)
+            return
+        cached = CachedResponse(etag, last_modified, response.content)
+        with self._lock:
+            self._remember(key, cached, data, response)
+        if not (etag or last_modified):
+            return
+        try:
+            with self._lock:
+                db = self._connect()
+                db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                    (key, *cached),
+                )
+                db.commit()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Could not write response cache: %s", e)
+
+    def _forget(self, key: str) -> None:
+        """Remove a response from memory and from the database."""
+        with self._lock:
+            self._memory.pop(key, None)
+        if self._db is None and not self.path.exists():
+            # Nothing was ever stored, do not create the database for it.
+            return
+        try:
+            with self._lock:
+                db = self._connect()
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                db.commit()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Could not write response cache: %s", e)
+
+    def clear(self) -> None:
+        """Remove every cached response."""
+        with self._lock:
+            self._memory.clear()
+            db = self._connect()
+            db.execute("DELETE FROM responses")
+            db.commit()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
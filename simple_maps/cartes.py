@@ -14,34 +14,142 @@ Cartes.io returns the following status codes in its API:
 | 500         | INTERNAL SERVER ERROR |
 """
 import logging
+import time
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, TypeVar
 
-from .util import request_json
+import httpx
 
+from .cache import ResponseCache
+from .enums import Permission, Privacy
+from .ratelimit import RetryBucket, TokenBucket, retry_delay
+from .util import (
+    LIMITS,
+    RequestType,
+    create_client,
+    request_json,
+    request_json_iter,
+)
 
-class Privacy(str, Enum):
-    """Privacy level for map creation."""
 
-    PUBLIC = "public"
-    UNLISTED = "unlisted"
-    PRIVATE = "private"
+# Default API throttle of cartes.io: 60 requests per minute.
+RATE_LIMIT = (60.0, 1.0)
 
+T = TypeVar("T")
+# Marks a streamed list that ended before its first item.
+_END = object()
 
-class Permission(str, Enum):
-    """Who can create markers."""
 
-    YES = "yes"
-    NO = "no"
-    LOGGED = "only_logged_in"
+def compact(**params: Any) -> Dict[str, Any]:
+    """Return the params that are set, with enums as their values."""
+    return {
+        key: value.value if isinstance(value, Enum) else value
+        for key, value in params.items()
+        if value is not None
+    }
+
+
+def check_marker(
+    lat: float,
+    lng: float,
+    category: Optional[int] = None,
+    category_name: Optional[str] = None,
+) -> None:
+    """Raise ValueError if a marker with these values can't be created."""
+    if not (
+        -90 <= lat <= 90
+        and -180 <= lng <= 180
+        and (category is not None or category_name is not None)
+        and (category is None or category >= 1)
+    ):
+        logging.error(
+            "Invalid coordinate value for marker: (%s, %s).", lat, lng
+        )
+        raise ValueError
 
 
 class Cartes:
     """Wrapper class for interacting with the Cartes.io API."""
 
-    def __init__(self, base_url: str = "https://cartes.io/api"):
-        """Set API base URL."""
+    def __init__(
+        self,
+        base_url: str = "https://cartes.io/api",
+        client: Optional[httpx.Client] = None,
+        cache: Optional[ResponseCache] = None,
+        rate_limit: Optional[Tuple[float, float]] = RATE_LIMIT,
+        max_retries: int = 3,
+        limits: httpx.Limits = LIMITS,
+    ):
+        """
+        Set API base URL, the optional client to share and GET cache.
+
+        rate_limit is the (capacity, refill rate per second) of the token
+        bucket used to pace requests, or None to send them unpaced.
+        Requests rejected with 429 or 503 are retried up to max_retries
+        times, while the shared retry quota lasts. limits sizes the
+        connection pool of the client created when none is given.
+        """
         self.base_url = base_url
+        self._maps_url = f"{base_url}/maps"
+        self._owns_client = client is None
+        self.client = client or create_client(limits)
+        self.cache = cache
+        self._bucket = TokenBucket(*rate_limit) if rate_limit else None
+        self.max_retries = max_retries
+        self._retry_bucket = RetryBucket()
+
+    def __enter__(self) -> "Cartes":
+        """Enter the client context."""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Close the client if it was created here."""
+        self.close()
+
+    def close(self) -> None:
+        """Close the client if it was created here."""
+        if self._owns_client:
+            self.client.close()
+
+    def _request(
+        self,
+        request_type: RequestType,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        cached: bool = False,
+        body: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Send a request with the client of this instance."""
+        return self._retry(
+            lambda: request_json(
+                request_type=request_type,
+                url=url,
+                params=params,
+                client=self.client,
+                cache=self.cache if cached else None,
+                body=body,
+            )
+        )
+
+    def _retry(self, send: Callable[[], T]) -> T:
+        """Call send, again after a delay while it gets a 429 or 503."""
+        attempt = 0
+        while True:
+            if self._bucket is not None:
+                self._bucket.acquire()
+            try:
+                result = send()
+            except httpx.HTTPStatusError as e:
+                delay = retry_delay(
+                    e.response, attempt, self.max_retries, self._retry_bucket
+                )
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+            else:
+                self._retry_bucket.refund()
+                return result
 
     def map_get(self, map_uuid: str) -> Dict[str, Any]:
         """
@@ -49,8 +157,10 @@ class Cartes:
 
         GET /api/maps/{map-uuid}
         """
-        return request_json(
-            request_type="get", url=f"{self.base_url}/maps/{map_uuid}"
+        return self._request(
+            request_type="get",
+            url=f"{self._maps_url}/{map_uuid}",
+            cached=True,
         )
 
     def map_create(
@@ -66,16 +176,16 @@ class Cartes:
 
         POST /api/maps
         """
-        return request_json(
+        return self._request(
             request_type="post",
-            url=f"{self.base_url}/maps",
-            params={
-                "title": title,
-                "slug": slug,
-                "description": description,
-                "privacy": privacy,
-                "users_can_create_markers": users_can_create_markers,
-            },
+            url=self._maps_url,
+            body=compact(
+                title=title,
+                slug=slug,
+                description=description,
+                privacy=privacy,
+                users_can_create_markers=users_can_create_markers,
+            ),
         )
 
     def map_delete(self, token: str, map_id: str) -> Dict[str, Any]:
@@ -84,9 +194,9 @@ class Cartes:
 
         DELETE /api/maps/{map-id}
         """
-        return request_json(
+        return self._request(
             request_type="delete",
-            url=f"{self.base_url}/maps/{map_id}",
+            url=f"{self._maps_url}/{map_id}",
             params={
                 "token": token,
             },
@@ -100,14 +210,48 @@ class Cartes:
 
         GET /api/maps/{map-id}/markers
         """
-        return request_json(
+        return self._request(
             request_type="get",
-            url=f"{self.base_url}/maps/{map_id}/markers",
-            params={
-                "show_expired": show_expired,
-            },
+            url=f"{self._maps_url}/{map_id}/markers",
+            params=compact(show_expired=show_expired),
+            cached=True,
         )
 
+    def marker_list_iter(
+        self,
+        map_id: str,
+        show_expired: Optional[bool] = None,
+        geojson: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Get all markers on a map, parsing them one at a time.
+
+        With geojson the markers are requested as a FeatureCollection and
+        its features are yielded instead.
+
+        GET /api/maps/{map-id}/markers
+        """
+
+        def send() -> Tuple[Iterator[Dict[str, Any]], Any]:
+            # The status is checked before the body is read, so getting
+            # the first item is enough to retry a throttled request.
+            items = request_json_iter(
+                request_type="get",
+                url=f"{self._maps_url}/{map_id}/markers",
+                prefix="features.item" if geojson else "item",
+                params=compact(
+                    show_expired=show_expired,
+                    format="geojson" if geojson else None,
+                ),
+                client=self.client,
+            )
+            return items, next(items, _END)
+
+        items, first = self._retry(send)
+        if first is not _END:
+            yield first
+            yield from items
+
     def marker_create(
         self,
         map_token: str,
@@ -123,28 +267,19 @@ class Cartes:
 
         POST /api/maps/{map-id}/markers
         """
-        if (
-            (-90 <= lat <= 90)
-            and (-90 <= lng <= 90)
-            and (category is not None or category_name is not None)
-        ):
-            return request_json(
-                request_type="post",
-                url=f"{self.base_url}/maps/{map_id}/markers",
-                params={
-                    "map_token": map_token,
-                    "category": category,
-                    "lat": lat,
-                    "lng": lng,
-                    "description": description,
-                    "category_name": category_name,
-                },
-            )
-        else:
-            logging.error(
-                "Invalid coordinate value for marker: (%s, %s).", lat, lng
-            )
-            raise ValueError
+        check_marker(lat, lng, category, category_name)
+        return self._request(
+            request_type="post",
+            url=f"{self._maps_url}/{map_id}/markers",
+            body=compact(
+                map_token=map_token,
+                category=category,
+                lat=lat,
+                lng=lng,
+                description=description,
+                category_name=category_name,
+            ),
+        )
 
     def marker_edit(
         self,
@@ -158,10 +293,10 @@ class Cartes:
 
         PUT /api/maps/{map-id}/markers/{marker-id}
         """
-        return request_json(
+        return self._request(
             request_type="put",
-            url=f"{self.base_url}/maps/{map_id}/markers/{marker_id}",
-            params={"token": token, "description": description},
+            url=f"{self._maps_url}/{map_id}/markers/{marker_id}",
+            body=compact(token=token, description=description),
         )
 
     def marker_delete(
@@ -172,9 +307,9 @@ class Cartes:
 
         DELETE /api/maps/{map-id}/markers/{marker-id}
         """
-        return request_json(
+        return self._request(
             request_type="delete",
-            url=f"{self.base_url}/maps/{map_id}/markers/{marker_id}",
+            url=f"{self._maps_url}/{map_id}/markers/{marker_id}",
             params={
                 "token": token,
             },
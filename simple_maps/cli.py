@@ -1,10 +1,35 @@
 """CLI frontend to cartes.io API."""
-from typing import Optional
+import atexit
+import csv
+import functools
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from enum import Enum
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    cast,
+)
 
 import typer
-from requests.exceptions import HTTPError
 
-from .cartes import Cartes, Permission, Privacy
+from .enums import PERMISSION_VALUES, PRIVACY_VALUES
+
+if TYPE_CHECKING:
+    from .async_cartes import AsyncCartes
+    from .cache import ResponseCache
+    from .cartes import Cartes
+    from .enums import Permission, Privacy
 
 app = typer.Typer()
 
@@ -14,23 +39,157 @@ app.add_typer(map_app, name="map")
 marker_app = typer.Typer()
 app.add_typer(marker_app, name="marker")
 
-api = Cartes()
+_api: Optional["Cartes"] = None
+_cache: Optional["ResponseCache"] = None
+_use_cache = True
+
+
+def _get_cache() -> Optional["ResponseCache"]:
+    """Open the response cache shared by the clients, None with --no-cache."""
+    global _cache
+    if _cache is None and _use_cache:
+        from .cache import ResponseCache
+
+        _cache = ResponseCache()
+        atexit.register(_cache.close)
+    return _cache
+
+
+def _get_api() -> "Cartes":
+    """Create the API client on first use, importing httpx only then."""
+    global _api
+    if _api is None:
+        from .cartes import Cartes
+
+        _api = Cartes(cache=_get_cache())
+        atexit.register(_api.close)
+    return _api
+
+
+def _get_async_api() -> "AsyncCartes":
+    """Create an asynchronous client sharing the cache of the CLI client."""
+    from .async_cartes import AsyncCartes
+
+    return AsyncCartes(cache=_get_cache())
+
+
+def _run_async(call: Callable[["AsyncCartes"], Awaitable[Any]]) -> Any:
+    """Run call with an asynchronous client, closing it afterwards."""
+    import asyncio
+
+    async def run() -> Any:
+        api = _get_async_api()
+        try:
+            return await call(api)
+        finally:
+            await api.aclose()
+
+    return asyncio.run(run())
+
+
+@app.callback()
+def main(
+    cache: bool = typer.Option(
+        True,
+        help="Revalidate GET responses cached on disk instead of "
+        "downloading them again",
+    ),
+):
+    """Create maps with markers using the cartes.io API."""
+    global _use_cache
+    _use_cache = cache
+
+
+def _enum_callback(
+    values: Mapping[str, Enum]
+) -> Callable[[Optional[str]], Optional[Enum]]:
+    """Parse an option into one of the enum values."""
+
+    def callback(value: Optional[str]) -> Optional[Enum]:
+        if value is None:
+            return None
+        try:
+            return values[value]
+        except KeyError:
+            raise typer.BadParameter(f"choose from {', '.join(values)}")
+
+    return callback
+
+
+def _complete(values: Mapping[str, Enum]) -> Callable[..., List[str]]:
+    """Complete an option with the enum values."""
+
+    def complete(ctx: Any, param: Any, incomplete: str) -> List[str]:
+        return [value for value in values if value.startswith(incomplete)]
+
+    return complete
+
+
+def _metavar(values: Mapping[str, Enum]) -> str:
+    """Show the enum values in the help, as click.Choice does."""
+    return f"[{'|'.join(values)}]"
+
+
+def _emit(response: Any) -> None:
+    """Print a response as a line of JSON, ready to be piped to jq."""
+    import orjson
+
+    typer.echo(orjson.dumps(response))
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _cli_catch(message: str, value_errors: bool = False) -> Callable[[F], F]:
+    """
+    Print message and exit with code 1 when the command gets a HTTP error.
+
+    message is formatted with the command arguments. With value_errors
+    the ValueError of invalid markers is reported the same way.
+    """
+
+    def decorator(command: F) -> F:
+        @functools.wraps(command)
+        def wrapper(**kwargs: Any) -> Any:
+            import httpx
+
+            errors: Tuple[Type[Exception], ...] = (httpx.HTTPStatusError,)
+            if value_errors:
+                errors += (ValueError,)
+            try:
+                return command(**kwargs)
+            except errors as e:
+                typer.secho(
+                    message.format(**kwargs), fg=typer.colors.RED, err=True
+                )
+                raise typer.Exit(code=1) from e
+
+        return cast(F, wrapper)
+
+    return decorator
 
 
 @map_app.command("get")
+@_cli_catch('Error getting map "{map_id}"')
 def map_get(map_id: str = typer.Option(..., help="Id of the map")):
     """Get a single map."""
-    try:
-        response = api.map_get(map_id)
-        typer.echo(response)
-    except HTTPError:
-        typer.secho(
-            f'Error getting map "{map_id}"', fg=typer.colors.RED, err=True
-        )
-        raise typer.Exit(code=1)
+    _emit(_get_api().map_get(map_id))
+
+
+@map_app.command("batch-get")
+@_cli_catch("Error getting maps")
+def map_batch_get(
+    map_id: List[str] = typer.Option(
+        ..., help="Id of a map, repeat the option to get several"
+    ),
+):
+    """Get several maps concurrently."""
+    for response in _run_async(lambda api: api.map_get_many(map_id)):
+        _emit(response)
 
 
 @map_app.command("create")
+@_cli_catch('Error creating map "{title}"')
 def create_map(
     title: Optional[str] = typer.Option(None, help="The title of the map"),
     slug: Optional[str] = typer.Option(
@@ -39,43 +198,46 @@ def create_map(
     description: Optional[str] = typer.Option(
         None, help="The description of the map and its purpose"
     ),
-    privacy: Optional[Privacy] = typer.Option(
-        None, help="The privacy level of the map: public, unlisted, private"
+    privacy: Optional[str] = typer.Option(
+        None,
+        callback=_enum_callback(PRIVACY_VALUES),
+        shell_complete=_complete(PRIVACY_VALUES),
+        metavar=_metavar(PRIVACY_VALUES),
+        help=f"The privacy level of the map: {', '.join(PRIVACY_VALUES)}",
     ),
-    users_can_create_markers: Optional[Permission] = typer.Option(
-        None, help="The setting that defines who can create markers"
+    users_can_create_markers: Optional[str] = typer.Option(
+        None,
+        callback=_enum_callback(PERMISSION_VALUES),
+        shell_complete=_complete(PERMISSION_VALUES),
+        metavar=_metavar(PERMISSION_VALUES),
+        help="The setting that defines who can create markers: "
+        f"{', '.join(PERMISSION_VALUES)}",
     ),
 ):
     """Create a map."""
-    try:
-        response = api.map_create(
-            title, slug, description, privacy, users_can_create_markers
-        )
-        typer.echo(response)
-    except HTTPError:
-        typer.secho(
-            f'Error creating map "{title}"', fg=typer.colors.RED, err=True
-        )
-        raise typer.Exit(code=1)
+    # The option callbacks already turned the values into enums.
+    response = _get_api().map_create(
+        title,
+        slug,
+        description,
+        cast("Optional[Privacy]", privacy),
+        cast("Optional[Permission]", users_can_create_markers),
+    )
+    _emit(response)
 
 
 @map_app.command("delete")
+@_cli_catch('Error deleting map "{map_id}"')
 def map_delete(
     token: str = typer.Option(..., help="Token"),
     map_id: str = typer.Option(..., help="Map id"),
 ):
     """Delete a single map."""
-    try:
-        response = api.map_delete(token, map_id)
-        typer.echo(response)
-    except HTTPError:
-        typer.secho(
-            f'Error deleting map "{map_id}"', fg=typer.colors.RED, err=True
-        )
-        raise typer.Exit(code=1)
+    _emit(_get_api().map_delete(token, map_id))
 
 
 @marker_app.command("list")
+@_cli_catch("Error listing markers")
 def marker_list(
     map_id: str = typer.Option(..., help="Map id"),
     show_expired: Optional[bool] = typer.Option(
@@ -83,15 +245,30 @@ def marker_list(
     ),
 ):
     """Get all markers on a map."""
-    try:
-        response = api.marker_list(map_id)
-        typer.echo(response)
-    except HTTPError:
-        typer.secho("Error listing markers", fg=typer.colors.RED, err=True)
-        raise typer.Exit(code=1)
+    for marker in _get_api().marker_list_iter(map_id, show_expired):
+        _emit(marker)
+
+
+@marker_app.command("batch-list")
+@_cli_catch("Error listing markers")
+def marker_batch_list(
+    map_id: List[str] = typer.Option(
+        ..., help="Map id, repeat the option to list several maps"
+    ),
+    show_expired: Optional[bool] = typer.Option(
+        None, help="Show markers that have already expired"
+    ),
+):
+    """Get all markers on several maps concurrently."""
+    markers = _run_async(
+        lambda api: api.marker_list_many(map_id, show_expired)
+    )
+    for response in markers:
+        _emit(response)
 
 
 @marker_app.command("create")
+@_cli_catch("Error creating marker at ({lat}, {lng}).", value_errors=True)
 def marker_create(
     map_token: str = typer.Option(..., help="Map token"),
     map_id: str = typer.Option(..., help="Map id"),
@@ -99,37 +276,118 @@ def marker_create(
         ..., min=-90, max=90, help="The lat position of the marker"
     ),
     lng: float = typer.Option(
-        ..., min=-90, max=90, help="The lng position of the marker"
+        ..., min=-180, max=180, help="The lng position of the marker"
     ),
     category: Optional[int] = typer.Option(
         None,
+        min=1,
         help="Category ID. Use category_name if you don't know the ID",
     ),
     category_name: str = typer.Option(None, help="Category name"),
     description: str = typer.Option(None, help="Marker description"),
 ):
     """Create a marker on a map."""
+    response = _get_api().marker_create(
+        map_token,
+        map_id,
+        lat,
+        lng,
+        category,
+        category_name,
+        description,
+    )
+    _emit(response)
+
+
+def _read_markers(file: Path) -> List[Dict[str, Any]]:
+    """Read marker rows from a CSV, JSON Lines or JSON list file."""
+    suffix = file.suffix.lower()
+    with file.open(newline="") as f:
+        if suffix == ".csv":
+            rows = list(csv.DictReader(f))
+        elif suffix in (".jsonl", ".ndjson"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = json.load(f)
+
+    markers = []
+    for row in rows:
+        marker: Dict[str, Any] = {
+            "lat": float(row["lat"]),
+            "lng": float(row["lng"]),
+        }
+        if row.get("category") not in (None, ""):
+            marker["category"] = int(row["category"])
+        for key in ("category_name", "description"):
+            if row.get(key) not in (None, ""):
+                marker[key] = row[key]
+        markers.append(marker)
+    return markers
+
+
+@marker_app.command("bulk-create")
+def marker_bulk_create(
+    map_token: str = typer.Option(..., help="Map token"),
+    map_id: str = typer.Option(..., help="Map id"),
+    file: Path = typer.Option(
+        ...,
+        exists=True,
+        dir_okay=False,
+        help="CSV, JSON Lines or JSON file with lat, lng, category, "
+        "category_name and description of each marker",
+    ),
+    concurrency: int = typer.Option(
+        16,
+        min=1,
+        help="Number of markers created in parallel, up to the size of "
+        "the connection pool",
+    ),
+):
+    """Create many markers on a map from a file."""
+    import httpx
+
+    from .util import MAX_CONNECTIONS
+
     try:
-        response = api.marker_create(
-            map_token,
-            map_id,
-            lat,
-            lng,
-            category,
-            category_name,
-            description,
-        )
-        typer.echo(response)
-    except (HTTPError, ValueError):
+        markers = _read_markers(file)
+    except (KeyError, TypeError, ValueError):
         typer.secho(
-            f"Error creating marker at ({lat}, {lng}).",
+            f'Error reading markers from "{file}".',
             fg=typer.colors.RED,
             err=True,
         )
         raise typer.Exit(code=1)
 
+    failed = 0
+    api = _get_api()
+    workers = min(concurrency, MAX_CONNECTIONS)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                api.marker_create, map_token, map_id, **marker
+            ): marker
+            for marker in markers
+        }
+        for future in as_completed(futures):
+            marker = futures[future]
+            try:
+                _emit(future.result())
+            except (httpx.HTTPStatusError, ValueError):
+                failed += 1
+                typer.secho(
+                    f"Error creating marker at "
+                    f"({marker['lat']}, {marker['lng']}).",
+                    fg=typer.colors.RED,
+                    err=True,
+                )
+
+    typer.echo(f"Created {len(markers) - failed} of {len(markers)} markers.")
+    if failed:
+        raise typer.Exit(code=1)
+
 
 @marker_app.command("edit")
+@_cli_catch("Error editing marker {marker_id}.")
 def marker_edit(
     token: str = typer.Option(..., help="Marker token"),
     map_id: str = typer.Option(..., help="Map id"),
@@ -137,32 +395,60 @@ def marker_edit(
     description: str = typer.Option(None, help="Marker description"),
 ):
     """Edit a marker on a map."""
-    try:
-        response = api.marker_edit(token, map_id, marker_id, description)
-        typer.echo(response)
-    except HTTPError:
-        typer.secho(
-            f"Error editing marker {marker_id}.",
-            fg=typer.colors.RED,
-            err=True,
-        )
-        raise typer.Exit(code=1)
+    _emit(_get_api().marker_edit(token, map_id, marker_id, description))
 
 
 @marker_app.command("delete")
+@_cli_catch("Error deleting marker {marker_id}.")
 def marker_delete(
     token: str = typer.Option(..., help="Token"),
     map_id: str = typer.Option(..., help="Map id"),
     marker_id: str = typer.Option(..., help="Marker id"),
 ):
     """Delete a marker on a map."""
-    try:
-        response = api.marker_delete(token, map_id, marker_id)
-        typer.echo(response)
-    except HTTPError:
-        typer.secho(
-            f"Error deleting marker {marker_id}.",
-            fg=typer.colors.RED,
-            err=True,
-        )
+    _emit(_get_api().marker_delete(token, map_id, marker_id))
+
+
+BATCH_COMMANDS = (
+    "map_get",
+    "map_create",
+    "map_delete",
+    "marker_list",
+    "marker_create",
+    "marker_edit",
+    "marker_delete",
+)
+
+
+@app.command()
+def batch(
+    file: Path = typer.Option(
+        ...,
+        exists=True,
+        dir_okay=False,
+        help='NDJSON file with one {"cmd": ..., "args": {...}} per line, '
+        f"where cmd is one of {', '.join(BATCH_COMMANDS)}",
+    ),
+):
+    """Run many API calls with a single client and connection pool."""
+    import httpx
+
+    api = _get_api()
+    dispatch = {name: getattr(api, name) for name in BATCH_COMMANDS}
+    failed = 0
+    with file.open() as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                command = json.loads(line)
+                _emit(dispatch[command["cmd"]](**command.get("args", {})))
+            except (httpx.HTTPStatusError, KeyError, TypeError, ValueError):
+                failed += 1
+                typer.secho(
+                    f"Error running line {number}.",
+                    fg=typer.colors.RED,
+                    err=True,
+                )
+    if failed:
         raise typer.Exit(code=1)
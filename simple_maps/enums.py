@@ -0,0 +1,34 @@
+"""
+Enums accepted by the cartes.io API.
+
+Kept apart from `cartes` so the CLI can declare its options without
+importing the HTTP client.
+"""
+from enum import Enum
+from types import MappingProxyType
+from typing import Mapping
+
+
+class Privacy(str, Enum):
+    """Privacy level for map creation."""
+
+    PUBLIC = "public"
+    UNLISTED = "unlisted"
+    PRIVATE = "private"
+
+
+class Permission(str, Enum):
+    """Who can create markers."""
+
+    YES = "yes"
+    NO = "no"
+    LOGGED = "only_logged_in"
+
+
+# Value lookups used to parse CLI options with a single dict access.
+PRIVACY_VALUES: Mapping[str, Privacy] = MappingProxyType(
+    {privacy.value: privacy for privacy in Privacy}
+)
+PERMISSION_VALUES: Mapping[str, Permission] = MappingProxyType(
+    {permission.value: permission for permission in Permission}
+)
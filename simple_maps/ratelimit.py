@@ -0,0 +1,141 @@
+"""Client-side pacing and retrying of requests to the cartes.io API."""
+import asyncio
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+
+# Statuses telling that the request was not processed and can be resent.
+RETRY_STATUSES = frozenset({429, 503})
+RETRY_BASE_DELAY = 0.5
+MAX_RETRY_DELAY = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket that delays requests over the allowed rate.
+
+    Holds up to `capacity` tokens, refilled at `refill_rate` tokens per
+    second. Each request takes one token; when the bucket is empty the
+    caller sleeps until its token is refilled, instead of being
+    rejected with 429 by the server.
+    """
+
+    def __init__(self, capacity: float, refill_rate: float):
+        """Start with a full bucket."""
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token and return how many seconds to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._last) * self.refill_rate,
+            )
+            self._last = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.refill_rate
+
+    def acquire(self) -> None:
+        """Block until a request can be sent."""
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """Like acquire, without blocking the event loop."""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class RetryBucket:
+    """
+    Retry quota shared by all the requests of a client.
+
+    Each retry costs `retry_cost` tokens and each success refunds
+    `success_increment`, so when the service keeps failing the quota
+    runs out and requests fail fast instead of piling up retries.
+    """
+
+    def __init__(
+        self,
+        capacity: float = 500,
+        retry_cost: float = 5,
+        success_increment: float = 0.1,
+    ):
+        """Start with a full quota."""
+        self.capacity = capacity
+        self.retry_cost = retry_cost
+        self.success_increment = success_increment
+        self._tokens = capacity
+        self._lock = threading.Lock()
+
+    def try_consume(self) -> bool:
+        """Take the cost of a retry, return False if it is not available."""
+        with self._lock:
+            if self._tokens < self.retry_cost:
+                return False
+            self._tokens -= self.retry_cost
+            return True
+
+    def refund(self) -> None:
+        """Give back part of the quota after a success."""
+        with self._lock:
+            self._tokens = min(
+                self.capacity, self._tokens + self.success_increment
+            )
+
+
+def _parse_retry_after(value: str) -> Optional[float]:
+    """Parse a Retry-After header, in seconds or as an HTTP date."""
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(
+    response: httpx.Response,
+    attempt: int,
+    max_retries: int,
+    bucket: RetryBucket,
+) -> Optional[float]:
+    """
+    Return how many seconds to wait before retrying, or None to give up.
+
+    Honors Retry-After when the server sends it, otherwise backs off
+    exponentially with jitter. Both are capped to MAX_RETRY_DELAY.
+    """
+    if (
+        response.status_code not in RETRY_STATUSES
+        or attempt >= max_retries
+        or not bucket.try_consume()
+    ):
+        return None
+
+    delay = _parse_retry_after(response.headers.get("Retry-After", ""))
+    if delay is None:
+        delay = RETRY_BASE_DELAY * 2**attempt + random.random() * 0.1
+    delay = min(delay, MAX_RETRY_DELAY)
+    logger.warning(
+        "HTTP %s, retrying in %.1f seconds.", response.status_code, delay
+    )
+    return delay
@@ -1,35 +1,250 @@
 """Util functions."""
+import atexit
 import logging
-from json.decoder import JSONDecodeError
-from typing import Any, Dict, Literal, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Literal, Mapping, Optional, Tuple
 
-import requests
+import httpx
+import ijson
+import orjson
+
+from .cache import MISSING, CachedResponse, ResponseCache, cache_key
 
-ContentType = Literal["application/json"]
 RequestType = Literal["get", "put", "post", "delete"]
+METHODS: Mapping[RequestType, str] = MappingProxyType(
+    {"get": "GET", "put": "PUT", "post": "POST", "delete": "DELETE"}
+)
+
+TIMEOUT = httpx.Timeout(10.0, connect=3.0)
+MAX_CONNECTIONS = 20
+# Each connection costs a file descriptor, so the pools only keep as many
+# as the concurrent commands use. Idle connections stay open for a minute
+# so that the requests of one process, such as the paced calls of batch,
+# bulk-create and batch-get, reuse them. The pool is closed at exit.
+LIMITS = httpx.Limits(
+    max_keepalive_connections=10,
+    max_connections=MAX_CONNECTIONS,
+    keepalive_expiry=60.0,
+)
+ASYNC_LIMITS = httpx.Limits(
+    max_keepalive_connections=10, max_connections=32, keepalive_expiry=60.0
+)
+# Sent by every client, so that errors also come back as JSON.
+DEFAULT_HEADERS = MappingProxyType({"Accept": "application/json"})
+JSON_HEADERS = MappingProxyType({"Content-Type": "application/json"})
 
 logger = logging.getLogger(__name__)
 
+# Returned by _decode_json, as a JSON body can also be null.
+_NOT_JSON = object()
 
-def request_json(
+
+def create_client(limits: httpx.Limits = LIMITS) -> httpx.Client:
+    """Create a HTTP/2 client with connection pooling."""
+    return httpx.Client(
+        headers=DEFAULT_HEADERS,
+        timeout=TIMEOUT,
+        transport=httpx.HTTPTransport(http2=True, limits=limits, retries=3),
+    )
+
+
+def create_async_client(
+    limits: httpx.Limits = ASYNC_LIMITS,
+) -> httpx.AsyncClient:
+    """Create an asynchronous HTTP/2 client with connection pooling."""
+    return httpx.AsyncClient(
+        headers=DEFAULT_HEADERS,
+        timeout=TIMEOUT,
+        transport=httpx.AsyncHTTPTransport(
+            http2=True, limits=limits, retries=3
+        ),
+    )
+
+
+# Only used by the calls that pass no client, Cartes brings its own.
+_CLIENT: Optional[httpx.Client] = None
+
+
+def _get_client() -> httpx.Client:
+    """Create the shared client on first use, closing it at exit."""
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = create_client()
+        atexit.register(close_client)
+    return _CLIENT
+
+
+def close_client() -> None:
+    """Close the shared client and its pooled connections."""
+    global _CLIENT
+    if _CLIENT is not None:
+        _CLIENT.close()
+        _CLIENT = None
+
+
+def _prepare_params(
+    params: Optional[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """Drop None params, httpx would send them as empty strings."""
+    if params and any(v is None for v in params.values()):
+        return {k: v for k, v in params.items() if v is not None}
+    return params
+
+
+def _encode_body(
+    body: Optional[Dict[str, Any]], headers: Optional[Dict[str, Any]]
+) -> Tuple[Optional[bytes], Optional[Dict[str, Any]]]:
+    """Encode a JSON body with orjson, without its None values."""
+    if body is None:
+        return None, headers
+    content = orjson.dumps(_prepare_params(body))
+    return content, {**(headers or {}), **JSON_HEADERS}
+
+
+def _decode_json(response: httpx.Response) -> Any:
+    """Return the response JSON, or _NOT_JSON when the body is not JSON."""
+    # Text bodies, such as the message of a deletion, are not even parsed.
+    if "json" not in response.headers.get("Content-Type", "json"):
+        return _NOT_JSON
+    try:
+        return orjson.loads(response.content)
+    except orjson.JSONDecodeError:
+        logging.exception("API response was not a valid JSON.")
+        return _NOT_JSON
+
+
+def _cache_lookup(
+    cache: Optional[ResponseCache],
     request_type: RequestType,
     url: str,
-    headers: Dict[str, Any] = None,
-    params: Optional[Dict[str, Any]] = None,
-) -> Dict[str, Any]:
-    """Do a HTTP request that returns a JSON."""
-    response = requests.request(
-        request_type, url, headers=headers, params=params
-    )
+    params: Optional[Dict[str, Any]],
+) -> Tuple[Optional[str], Optional[CachedResponse]]:
+    """Return the cache key and cached response of a GET request."""
+    if cache is None or request_type != "get":
+        return None, None
+    key = cache_key(url, params)
+    return key, cache.get(key)
+
 
+def _parse_cached_response(
+    response: httpx.Response,
+    cache: Optional[ResponseCache],
+    key: Optional[str],
+    cached: Optional[CachedResponse],
+) -> Dict[str, Any]:
+    """Return the cached body on 304, otherwise parse and cache it."""
+    if cache is not None and cached is not None and key is not None:
+        if response.status_code == 304:
+            return cache.load(key, cached, response)
     try:
         response.raise_for_status()
-    except requests.exceptions.HTTPError as e:
+    except httpx.HTTPStatusError as e:
         logger.error("Request error: %s", e)
         raise
 
-    try:
-        return response.json()
-    except JSONDecodeError:
-        logging.exception("API response was not a valid JSON.")
+    data = _decode_json(response)
+    if data is _NOT_JSON:
+        # Not cached, a 304 would have to parse the stored body as JSON.
         return {"response": response.text}
+    if cache is not None and key is not None:
+        cache.store(key, response, data)
+    return data
+
+
+def request_json(
+    request_type: RequestType,
+    url: str,
+    headers: Optional[Dict[str, Any]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    client: Optional[httpx.Client] = None,
+    cache: Optional[ResponseCache] = None,
+    body: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Do a HTTP request that returns a JSON, sending body as JSON.
+
+    Bodies from the cache are shared between calls, do not mutate them.
+    """
+    params = _prepare_params(params)
+    key, cached = _cache_lookup(cache, request_type, url, params)
+    fresh = cache.fresh(key) if cache is not None and key else MISSING
+    if fresh is not MISSING:
+        return fresh
+    if cached is not None:
+        headers = {**(headers or {}), **cached.validators}
+    content, headers = _encode_body(body, headers)
+
+    response = (client or _get_client()).request(
+        METHODS[request_type],
+        url,
+        headers=headers,
+        params=params,
+        content=content,
+    )
+    return _parse_cached_response(response, cache, key, cached)
+
+
+def request_json_iter(
+    request_type: RequestType,
+    url: str,
+    prefix: str = "item",
+    headers: Optional[Dict[str, Any]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    client: Optional[httpx.Client] = None,
+) -> Iterator[Any]:
+    """
+    Do a HTTP request and yield the JSON items under prefix.
+
+    The body is parsed incrementally as it is received, so large arrays
+    are never held in memory as a whole. Streamed responses are not
+    cached.
+    """
+    with (client or _get_client()).stream(
+        METHODS[request_type],
+        url,
+        headers=headers,
+        params=_prepare_params(params),
+    ) as response:
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            logger.error("Request error: %s", e)
+            raise
+
+        items = ijson.sendable_list()
+        parser = ijson.items_coro(items, prefix, use_float=True)
+        for chunk in response.iter_bytes():
+            parser.send(chunk)
+            yield from items
+            del items[:]
+        parser.close()
+        yield from items
+
+
+async def request_json_async(
+    client: httpx.AsyncClient,
+    request_type: RequestType,
+    url: str,
+    headers: Optional[Dict[str, Any]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    cache: Optional[ResponseCache] = None,
+    body: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Do an asynchronous HTTP request that returns a JSON."""
+    params = _prepare_params(params)
+    key, cached = _cache_lookup(cache, request_type, url, params)
+    fresh = cache.fresh(key) if cache is not None and key else MISSING
+    if fresh is not MISSING:
+        return fresh
+    if cached is not None:
+        headers = {**(headers or {}), **cached.validators}
+    content, headers = _encode_body(body, headers)
+
+    response = await client.request(
+        METHODS[request_type],
+        url,
+        headers=headers,
+        params=params,
+        content=content,
+    )
+    return _parse_cached_response(response, cache, key, cached)
@@ -0,0 +1,74 @@
+import asyncio
+
+import httpx
+
+from simple_maps.async_cartes import AsyncCartes
+
+
+def test_map_get_many():
+    def handler(request):
+        return httpx.Response(200, json={"uuid": request.url.path[-1]})
+
+    async def get_maps():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async with AsyncCartes(base_url="https://x", client=client) as api:
+            return await api.map_get_many(["a", "b", "c"])
+
+    assert asyncio.run(get_maps()) == [
+        {"uuid": "a"},
+        {"uuid": "b"},
+        {"uuid": "c"},
+    ]
+
+
+def test_marker_list_many():
+    def handler(request):
+        map_id = request.url.path.split("/")[-2]
+        return httpx.Response(200, json=[{"map_id": map_id}])
+
+    async def list_markers():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async with AsyncCartes(base_url="https://x", client=client) as api:
+            return await api.marker_list_many(["a", "b"])
+
+    assert asyncio.run(list_markers()) == [
+        [{"map_id": "a"}],
+        [{"map_id": "b"}],
+    ]
+
+
+def test_marker_create_many_returns_failures():
+    def handler(request):
+        return httpx.Response(200, json={"id": 1})
+
+    async def create_markers():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async with AsyncCartes(base_url="https://x", client=client) as api:
+            return await api.marker_create_many(
+                "token",
+                "map-id",
+                [
+                    {"lat": 45.0, "lng": 10.0, "category_name": "Sharks"},
+                    {"lat": 45.0, "lng": 10.0},
+                ],
+            )
+
+    created, failed = asyncio.run(create_markers())
+    assert created == {"id": 1}
+    assert isinstance(failed, ValueError)
+
+
+def test_identical_gets_in_flight_are_sent_once():
+    sent = []
+
+    def handler(request):
+        sent.append(request)
+        return httpx.Response(200, json={"uuid": "a"})
+
+    async def get_maps():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async with AsyncCartes(base_url="https://x", client=client) as api:
+            return await api.map_get_many(["a", "a", "a"])
+
+    assert asyncio.run(get_maps()) == [{"uuid": "a"}] * 3
+    assert len(sent) == 1
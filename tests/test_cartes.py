@@ -0,0 +1,174 @@
+from types import SimpleNamespace
+
+import httpx
+import orjson
+import pytest
+
+from simple_maps import cartes
+from simple_maps.cartes import Cartes, Privacy, check_marker, compact
+
+
+@pytest.fixture(scope="module")
+def _recording_api():
+    sent = []
+
+    def handler(request):
+        sent.append(request)
+        return httpx.Response(200, json=[])
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        # Without pacing, the module would share one 60 request bucket.
+        api = Cartes(base_url="https://x/api", client=client, rate_limit=None)
+        yield api, sent
+
+
+@pytest.fixture
+def recording_api(_recording_api):
+    api, sent = _recording_api
+    sent.clear()
+    return api, sent
+
+
+def test_compact():
+    assert compact(title="t", slug=None, privacy=Privacy.UNLISTED) == {
+        "title": "t",
+        "privacy": "unlisted",
+    }
+
+
+ROUTES = [
+    ("map_get", ("map-id",), "GET", "/maps/map-id", {}),
+    (
+        "map_delete",
+        ("token", "map-id"),
+        "DELETE",
+        "/maps/map-id",
+        {"token": "token"},
+    ),
+    ("marker_list", ("map-id",), "GET", "/maps/map-id/markers", {}),
+    (
+        "marker_edit",
+        ("token", "map-id", "marker-id"),
+        "PUT",
+        "/maps/map-id/markers/marker-id",
+        {},
+    ),
+    (
+        "marker_delete",
+        ("token", "map-id", "marker-id"),
+        "DELETE",
+        "/maps/map-id/markers/marker-id",
+        {"token": "token"},
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "method, args, request_type, path, params",
+    ROUTES,
+    ids=[route[0] for route in ROUTES],
+)
+def test_request_routes(
+    recording_api, method, args, request_type, path, params
+):
+    api, sent = recording_api
+    getattr(api, method)(*args)
+
+    assert sent[0].method == request_type
+    assert str(sent[0].url.copy_with(query=None)) == f"https://x/api{path}"
+    assert dict(sent[0].url.params) == params
+
+
+def test_context_manager_closes_own_client_only():
+    with Cartes() as api:
+        pass
+    assert api.client.is_closed
+
+    shared = httpx.Client()
+    with Cartes(client=shared):
+        pass
+    assert not shared.is_closed
+
+
+def test_retries_throttled_requests(monkeypatch):
+    delays = []
+    # Replace the time module seen by cartes only, not time.sleep itself.
+    monkeypatch.setattr(cartes, "time", SimpleNamespace(sleep=delays.append))
+    responses = iter(
+        [
+            httpx.Response(429, headers={"Retry-After": "2"}),
+            httpx.Response(503),
+            httpx.Response(200, json={"uuid": "map-id"}),
+        ]
+    )
+    client = httpx.Client(
+        transport=httpx.MockTransport(lambda request: next(responses))
+    )
+    api = Cartes(base_url="https://x", client=client, rate_limit=None)
+
+    assert api.map_get("map-id") == {"uuid": "map-id"}
+    assert delays[0] == 2.0
+    assert len(delays) == 2
+
+
+def test_marker_list_iter_retries_throttled_requests(monkeypatch):
+    delays = []
+    monkeypatch.setattr(cartes, "time", SimpleNamespace(sleep=delays.append))
+    responses = iter(
+        [
+            httpx.Response(429, headers={"Retry-After": "1"}),
+            httpx.Response(200, json=[{"id": 1}]),
+        ]
+    )
+    client = httpx.Client(
+        transport=httpx.MockTransport(lambda request: next(responses))
+    )
+    api = Cartes(base_url="https://x", client=client, rate_limit=None)
+
+    assert list(api.marker_list_iter("m")) == [{"id": 1}]
+    assert delays == [1.0]
+
+
+def test_marker_create_sends_only_set_params(recording_api):
+    api, sent = recording_api
+    api.marker_create("token", "map-id", 45.0, 10.0, category_name="Sharks")
+    assert not sent[0].url.params
+    assert orjson.loads(sent[0].content) == {
+        "map_token": "token",
+        "lat": 45.0,
+        "lng": 10.0,
+        "category_name": "Sharks",
+    }
+
+
+def test_marker_list_iter_geojson():
+    sent = []
+
+    def handler(request):
+        sent.append(request)
+        features = [{"type": "Feature", "id": 1}]
+        return httpx.Response(
+            200, json={"type": "FeatureCollection", "features": features}
+        )
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    api = Cartes(base_url="https://x", client=client)
+    markers = list(api.marker_list_iter("map-id", geojson=True))
+
+    assert markers == [{"type": "Feature", "id": 1}]
+    assert sent[0].url.params["format"] == "geojson"
+
+
+def test_check_marker_accepts_bounds():
+    check_marker(-90, 180, category=1)
+    check_marker(90, -180, category_name="Sharks")
+
+
+@pytest.mark.parametrize(
+    "lat, lng, category",
+    [(91, 0, 1), (-91, 0, 1), (0, 181, 1), (0, -181, 1), (0, 0, 0)],
+    ids=["lat>90", "lat<-90", "lng>180", "lng<-180", "category<1"],
+)
+def test_check_marker_rejects(lat, lng, category):
+    with pytest.raises(ValueError):
+        check_marker(lat, lng, category=category)
@@ -0,0 +1,292 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, create_autospec, patch
+
+import httpx
+import pytest
+import typer
+from click.testing import CliRunner
+
+from simple_maps import cli
+from simple_maps.cache import ResponseCache
+from simple_maps.cartes import Cartes
+from simple_maps.cli import _read_markers, app
+from simple_maps.enums import Privacy
+
+runner = CliRunner()
+# Built once, typer's CliRunner would rebuild it on every invoke.
+command = typer.main.get_command(app)
+
+NOT_FOUND = httpx.HTTPStatusError(
+    "Not Found",
+    request=httpx.Request("GET", "https://x"),
+    response=httpx.Response(404),
+)
+
+# Arguments of marker bulk-create, up to the path of the markers file.
+BULK_CREATE = (
+    "marker",
+    "bulk-create",
+    "--map-token",
+    "token",
+    "--map-id",
+    "map-id",
+    "--file",
+)
+
+
+@pytest.fixture(scope="module")
+def _patched_api():
+    # _get_api returns the client already created, so no patch is needed.
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        # Calls to methods Cartes does not have fail instead of passing.
+        api = create_autospec(Cartes, instance=True)
+        monkeypatch.setattr(cli, "_api", api)
+        yield api
+
+
+@pytest.fixture
+def mock_api(_patched_api):
+    _patched_api.reset_mock(return_value=True, side_effect=True)
+    return _patched_api
+
+
+def test_marker_bulk_create(mock_api, tmp_path):
+    markers = tmp_path / "markers.csv"
+    markers.write_text(
+        "lat,lng,category_name,description\n"
+        "45.0,10.0,Sharks,First\n"
+        "46.0,11.0,Sharks,\n"
+    )
+    mock_api.marker_create.return_value = {"id": 1}
+
+    result = runner.invoke(command, (*BULK_CREATE, str(markers)))
+
+    assert result.exit_code == 0
+    assert "Created 2 of 2 markers." in result.output
+    mock_api.marker_create.assert_any_call(
+        "token",
+        "map-id",
+        lat=46.0,
+        lng=11.0,
+        category_name="Sharks",
+    )
+
+
+def test_marker_bulk_create_reports_failures(mock_api, tmp_path):
+    markers = tmp_path / "markers.json"
+    markers.write_text(
+        json.dumps([{"lat": 45, "lng": 10}, {"lat": 46, "lng": 11}])
+    )
+    mock_api.marker_create.side_effect = [{"id": 1}, ValueError]
+
+    result = runner.invoke(
+        command, (*BULK_CREATE, str(markers), "--concurrency", "1")
+    )
+
+    assert result.exit_code == 1
+    assert "Created 1 of 2 markers." in result.output
+
+
+def test_map_create_parses_enums(mock_api):
+    mock_api.map_create.return_value = {"uuid": "map-id"}
+
+    result = runner.invoke(
+        command,
+        ("map", "create", "--privacy", "unlisted", "--title", "Sharks"),
+    )
+
+    assert result.exit_code == 0
+    mock_api.map_create.assert_called_once_with(
+        "Sharks", None, None, Privacy.UNLISTED, None
+    )
+
+
+def test_map_create_rejects_unknown_privacy(mock_api):
+    result = runner.invoke(command, ("map", "create", "--privacy", "secret"))
+
+    assert result.exit_code == 2
+    mock_api.map_create.assert_not_called()
+
+
+def test_marker_list_echoes_each_marker(mock_api, capsys):
+    mock_api.marker_list_iter.return_value = iter([{"id": 1}, {"id": 2}])
+
+    # Options are parsed by the other tests, call the command directly.
+    cli.marker_list(map_id="map-id", show_expired=True)
+
+    assert capsys.readouterr().out.splitlines() == ['{"id":1}', '{"id":2}']
+    mock_api.marker_list_iter.assert_called_once_with("map-id", True)
+
+
+def test_batch_dispatches_each_line(mock_api, tmp_path):
+    commands = tmp_path / "commands.ndjson"
+    commands.write_text(
+        '{"cmd": "map_get", "args": {"map_uuid": "map-id"}}\n'
+        "\n"
+        '{"cmd": "unknown"}\n'
+    )
+    mock_api.map_get.return_value = {"uuid": "map-id"}
+
+    result = runner.invoke(command, ("batch", "--file", str(commands)))
+
+    assert result.exit_code == 1
+    assert "Error running line 3." in result.output
+    mock_api.map_get.assert_called_once_with(map_uuid="map-id")
+
+
+def test_map_batch_get_closes_async_client(capsys):
+    with patch("simple_maps.cli._get_async_api") as get_async_api:
+        api = get_async_api.return_value = AsyncMock()
+        api.map_get_many.return_value = [{"uuid": "a"}, {"uuid": "b"}]
+
+        cli.map_batch_get(map_id=["a", "b"])
+
+    out = capsys.readouterr().out
+    assert out.splitlines() == ['{"uuid":"a"}', '{"uuid":"b"}']
+    api.map_get_many.assert_awaited_once_with(["a", "b"])
+    api.aclose.assert_awaited_once()
+
+
+def test_async_api_shares_cache_without_sync_client(monkeypatch, tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    monkeypatch.setattr(cli, "_cache", cache)
+    monkeypatch.setattr(cli, "_api", None)
+
+    api = cli._get_async_api()
+    asyncio.run(api.aclose())
+
+    assert api.cache is cache
+    assert cli._api is None
+
+
+def test_no_cache_disables_shared_cache(mock_api, monkeypatch):
+    monkeypatch.setattr(cli, "_cache", None)
+    monkeypatch.setattr(cli, "_use_cache", True)
+    mock_api.map_get.return_value = {}
+
+    result = runner.invoke(
+        command, ("--no-cache", "map", "get", "--map-id", "m")
+    )
+
+    assert result.exit_code == 0
+    assert cli._get_cache() is None
+
+
+def test_read_markers_json_lines(tmp_path):
+    markers = tmp_path / "markers.jsonl"
+    markers.write_text(
+        '{"lat": 45, "lng": 10, "category": "2"}\n\n{"lat": 46, "lng": 11}\n'
+    )
+
+    assert _read_markers(markers) == [
+        {"lat": 45.0, "lng": 10.0, "category": 2},
+        {"lat": 46.0, "lng": 11.0},
+    ]
+
+
+# Arguments, API method, expected API call arguments and error message of
+# each command, by its name.
+COMMANDS = {
+    "map get": (
+        ("map", "get", "--map-id", "m"),
+        "map_get",
+        ("m",),
+        'Error getting map "m"',
+    ),
+    "map create": (
+        ("map", "create", "--title", "Sharks"),
+        "map_create",
+        ("Sharks", None, None, None, None),
+        'Error creating map "Sharks"',
+    ),
+    "map delete": (
+        ("map", "delete", "--token", "t", "--map-id", "m"),
+        "map_delete",
+        ("t", "m"),
+        'Error deleting map "m"',
+    ),
+    "marker list": (
+        ("marker", "list", "--map-id", "m"),
+        "marker_list_iter",
+        ("m", None),
+        "Error listing markers",
+    ),
+    "marker create": (
+        (
+            "marker",
+            "create",
+            "--map-token",
+            "t",
+            "--map-id",
+            "m",
+            "--lat",
+            "45",
+            "--lng",
+            "10",
+        ),
+        "marker_create",
+        ("t", "m", 45.0, 10.0, None, None, None),
+        "Error creating marker at (45.0, 10.0).",
+    ),
+    "marker edit": (
+        (
+            "marker",
+            "edit",
+            "--token",
+            "t",
+            "--map-id",
+            "m",
+            "--marker-id",
+            "1",
+        ),
+        "marker_edit",
+        ("t", "m", "1", None),
+        "Error editing marker 1.",
+    ),
+    "marker delete": (
+        (
+            "marker",
+            "delete",
+            "--token",
+            "t",
+            "--map-id",
+            "m",
+            "--marker-id",
+            "1",
+        ),
+        "marker_delete",
+        ("t", "m", "1"),
+        "Error deleting marker 1.",
+    ),
+}
+
+
+@pytest.mark.parametrize(
+    "args, method, expected, message",
+    COMMANDS.values(),
+    ids=COMMANDS.keys(),
+)
+def test_commands_call_api(mock_api, args, method, expected, message):
+    getattr(mock_api, method).return_value = {}
+
+    result = runner.invoke(command, args)
+
+    assert result.exit_code == 0
+    getattr(mock_api, method).assert_called_once_with(*expected)
+
+
+@pytest.mark.parametrize(
+    "args, method, expected, message",
+    COMMANDS.values(),
+    ids=COMMANDS.keys(),
+)
+def test_commands_report_http_errors(
+    mock_api, args, method, expected, message
+):
+    getattr(mock_api, method).side_effect = NOT_FOUND
+
+    result = runner.invoke(command, args)
+
+    assert result.exit_code == 1
+    assert message in result.output
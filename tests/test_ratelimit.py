@@ -0,0 +1,27 @@
+from simple_maps.ratelimit import RetryBucket, TokenBucket
+
+
+def test_token_bucket_delays_requests_over_capacity(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("simple_maps.ratelimit.time.monotonic", lambda: now[0])
+    bucket = TokenBucket(capacity=2, refill_rate=1.0)
+
+    assert bucket._reserve() == 0
+    assert bucket._reserve() == 0
+    assert bucket._reserve() == 1.0
+    assert bucket._reserve() == 2.0
+
+    now[0] += 10
+    assert bucket._reserve() == 0
+
+
+def test_retry_bucket_runs_out():
+    bucket = RetryBucket(capacity=10, retry_cost=5, success_increment=1)
+
+    assert bucket.try_consume()
+    assert bucket.try_consume()
+    assert not bucket.try_consume()
+
+    for _ in range(5):
+        bucket.refund()
+    assert bucket.try_consume()
@@ -0,0 +1,262 @@
+import httpx
+import pytest
+
+from simple_maps import util
+from simple_maps.cache import ResponseCache, cache_key
+from simple_maps.util import (
+    DEFAULT_HEADERS,
+    _prepare_params,
+    create_client,
+    request_json,
+    request_json_iter,
+)
+
+
+def make_client(handler, **kwargs):
+    return httpx.Client(transport=httpx.MockTransport(handler), **kwargs)
+
+
+def make_recording_client(
+    respond=lambda request: httpx.Response(200, json={}), **kwargs
+):
+    sent = []
+
+    def handler(request):
+        sent.append(request)
+        return respond(request)
+
+    return make_client(handler, **kwargs), sent
+
+
+def test_request_json_returns_json():
+    client = make_client(lambda request: httpx.Response(200, json={"a": 1}))
+    assert request_json("get", "https://x/maps", client=client) == {"a": 1}
+
+
+def test_request_json_omits_none_params():
+    client, sent = make_recording_client()
+
+    request_json(
+        "get",
+        "https://x/maps",
+        params={"title": "t", "slug": None},
+        client=client,
+    )
+    assert dict(sent[0].url.params) == {"title": "t"}
+
+
+def test_prepare_params_keeps_params_without_none():
+    params = {"title": "t"}
+    assert _prepare_params(params) is params
+
+
+@pytest.mark.parametrize("request_type", ["get", "post", "put", "delete"])
+def test_request_json_sends_params_in_query(request_type):
+    client, sent = make_recording_client()
+
+    request_json(
+        request_type,
+        "https://x/maps",
+        params={"key": "value"},
+        client=client,
+    )
+    assert sent[0].method == request_type.upper()
+    assert dict(sent[0].url.params) == {"key": "value"}
+    assert sent[0].content == b""
+
+
+def test_request_json_raises_on_http_error():
+    client = make_client(lambda request: httpx.Response(404))
+    with pytest.raises(httpx.HTTPStatusError):
+        request_json("get", "https://x/maps", client=client)
+
+
+def test_request_json_wraps_invalid_json():
+    client = make_client(lambda request: httpx.Response(200, text="ok"))
+    assert request_json("delete", "https://x/maps", client=client) == {
+        "response": "ok"
+    }
+
+
+def test_request_json_wraps_invalid_json_body():
+    client = make_client(
+        lambda request: httpx.Response(
+            200, content=b"ok", headers={"Content-Type": "application/json"}
+        )
+    )
+    assert request_json("get", "https://x/maps", client=client) == {
+        "response": "ok"
+    }
+
+
+def test_request_json_does_not_parse_text_responses():
+    client = make_client(lambda request: httpx.Response(200, text="[1]"))
+    assert request_json("delete", "https://x/maps", client=client) == {
+        "response": "[1]"
+    }
+
+
+def test_request_json_parses_json_without_content_type():
+    client = make_client(lambda request: httpx.Response(200, content=b"[1]"))
+    assert request_json("get", "https://x/maps", client=client) == [1]
+
+
+def test_request_json_revalidates_cached_get(tmp_path):
+    def respond(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={"a": 1}, headers={"ETag": '"v1"'})
+
+    client, sent = make_recording_client(respond)
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    for _ in range(2):
+        assert request_json(
+            "get", "https://x/maps", client=client, cache=cache
+        ) == {"a": 1}
+    assert "If-None-Match" not in sent[0].headers
+    assert sent[1].headers["If-None-Match"] == '"v1"'
+
+
+def test_request_json_does_not_cache_text_responses(tmp_path):
+    def handler(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="hello", headers={"ETag": '"v1"'})
+
+    client = make_client(handler)
+    request_json(
+        "get",
+        "https://x/maps",
+        client=client,
+        cache=ResponseCache(tmp_path / "cache.sqlite"),
+    )
+    # A new process only finds what was stored on disk.
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    assert request_json(
+        "get", "https://x/maps", client=client, cache=cache
+    ) == {"response": "hello"}
+    assert cache.get(cache_key("https://x/maps")) is None
+
+
+def test_request_json_iter_yields_items():
+    client = make_client(
+        lambda request: httpx.Response(200, json=[{"id": 1}, {"id": 2.5}])
+    )
+    assert list(request_json_iter("get", "https://x/m", client=client)) == [
+        {"id": 1},
+        {"id": 2.5},
+    ]
+
+
+def test_response_cache_survives_memory_eviction(tmp_path):
+    client = make_client(
+        lambda request: httpx.Response(
+            200, json={"path": request.url.path}, headers={"ETag": '"v1"'}
+        )
+    )
+    cache = ResponseCache(tmp_path / "cache.sqlite", maxsize=1)
+    request_json("get", "https://x/a", client=client, cache=cache)
+    request_json("get", "https://x/b", client=client, cache=cache)
+
+    assert list(cache._memory) == [cache_key("https://x/b")]
+    assert cache.get(cache_key("https://x/a")).etag == '"v1"'
+
+
+def test_request_json_sends_json_body():
+    client, sent = make_recording_client()
+
+    request_json(
+        "post",
+        "https://x/maps",
+        body={"title": "t", "slug": None},
+        client=client,
+    )
+    assert sent[0].headers["Content-Type"] == "application/json"
+    assert sent[0].content == b'{"title":"t"}'
+
+
+def test_request_json_merges_headers():
+    client, sent = make_recording_client(headers=DEFAULT_HEADERS)
+    request_json(
+        "post",
+        "https://x/maps",
+        headers={"X-Test": "1"},
+        body={"title": "t"},
+        client=client,
+    )
+    assert {
+        "accept": "application/json",
+        "content-type": "application/json",
+        "x-test": "1",
+    }.items() <= sent[0].headers.items()
+
+
+def test_request_json_reuses_fresh_response(tmp_path):
+    client, sent = make_recording_client(
+        lambda request: httpx.Response(
+            200, json={"a": 1}, headers={"Cache-Control": "max-age=60"}
+        )
+    )
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    for _ in range(2):
+        assert request_json(
+            "get", "https://x/maps", client=client, cache=cache
+        ) == {"a": 1}
+    assert len(sent) == 1
+
+
+def test_request_json_reuses_fresh_null_response(tmp_path):
+    client, sent = make_recording_client(
+        lambda request: httpx.Response(
+            200, content=b"null", headers={"Cache-Control": "max-age=60"}
+        )
+    )
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    for _ in range(2):
+        assert (
+            request_json("get", "https://x/maps", client=client, cache=cache)
+            is None
+        )
+    assert len(sent) == 1
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [{"ETag": '"v2"', "Cache-Control": "no-store"}, {}],
+    ids=["no-store", "no validators"],
+)
+def test_response_cache_honors_no_store(tmp_path, headers):
+    responses = iter(
+        [
+            httpx.Response(200, json={"v": 1}, headers={"ETag": '"v1"'}),
+            httpx.Response(200, json={"v": 2}, headers=headers),
+        ]
+    )
+    client = make_client(lambda request: next(responses))
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    for expected in ({"v": 1}, {"v": 2}):
+        assert (
+            request_json("get", "https://x/maps", client=client, cache=cache)
+            == expected
+        )
+
+    assert cache.get(cache_key("https://x/maps")) is None
+    fresh_cache = ResponseCache(tmp_path / "cache.sqlite")
+    assert fresh_cache.get(cache_key("https://x/maps")) is None
+
+
+def test_shared_client_is_created_on_first_use(monkeypatch):
+    client = make_client(lambda request: httpx.Response(200, json={}))
+    monkeypatch.setattr(util, "_CLIENT", None)
+    monkeypatch.setattr(util, "create_client", lambda: client)
+
+    request_json("get", "https://x/maps")
+    assert util._CLIENT is client
+    util.close_client()
+    assert util._CLIENT is None
+    assert client.is_closed
+
+
+def test_create_client_accepts_json():
+    with create_client() as client:
+        assert client.headers["Accept"] == "application/json"